@@ -1,24 +1,111 @@
 use anyhow::{anyhow, Result};
+use futures::future::{BoxFuture, FutureExt};
 use glib::{clone, MainContext, Priority};
 use gtk4::prelude::*;
 use gtk4::{
     ApplicationWindow, Box, Button, CellRendererText, CheckButton, ComboBoxText, Dialog,
     DialogFlags, Entry, Grid, Label, ListBox, ListBoxRow, Notebook, Paned, ResponseType,
-    ScrolledWindow, TextView, TreeIter, TreePath, TreeSelection, TreeStore, TreeView,
+    ScrolledWindow, SearchEntry, TreeIter, TreePath, TreeSelection, TreeStore, TreeView,
     TreeViewColumn, Window,
 };
 use log::{debug, error, info, warn};
-use std::cell::RefCell;
-use std::collections::HashMap;
+use std::cell::{Cell, RefCell};
+use std::collections::{HashMap, HashSet};
+use std::path::{Path, PathBuf};
 use std::rc::Rc;
-use std::sync::{Arc, Mutex};
+use std::sync::{Arc, Mutex, OnceLock};
 use tokio::runtime::Runtime;
 
 use crate::remote_host::{AuthType, RemoteHost};
-use crate::service_manager::{ServiceInfo, ServiceManager, ServiceStatus};
+use crate::service_manager::{ServiceInfo, ServiceManager, ServiceStatus, STATE_ALL, STATE_LISTED};
 use crate::ui::dialogs::*;
+use crate::utils::terminal::{spawn_in_terminal, terminal_command};
 use crate::utils::theme::ThemeManager;
 
+/// Number of journal lines loaded into the logs dialog
+const MAX_LOG_LINES: u32 = 1000;
+
+/// Runs a systemctl action on the named local service, against the user
+/// manager if the flag is set
+type LocalAction = fn(Arc<ServiceManager>, String, bool) -> BoxFuture<'static, Result<()>>;
+
+/// Service action buttons shown on both pages: label, verb for the log and
+/// the local action. After a local action only the affected service is
+/// re-read.
+const SERVICE_ACTIONS: &[(&str, &str, LocalAction)] = &[
+    ("▶ Start", "Starting", |manager, name, user| {
+        async move { manager.start_service(&name, user).await }.boxed()
+    }),
+    ("⏹ Stop", "Stopping", |manager, name, user| {
+        async move { manager.stop_service(&name, user).await }.boxed()
+    }),
+    ("🔄 Restart", "Restarting", |manager, name, user| {
+        async move { manager.restart_service(&name, user).await }.boxed()
+    }),
+    ("✓ Enable", "Enabling", |manager, name, user| {
+        async move { manager.enable_service(&name, user).await }.boxed()
+    }),
+    ("✗ Disable", "Disabling", |manager, name, user| {
+        async move { manager.disable_service(&name, user).await }.boxed()
+    }),
+];
+
+/// A service currently shown in a services store, with the state it was
+/// last rendered with
+struct ServiceRow {
+    iter: TreeIter,
+    status: ServiceStatus,
+    description: Option<String>,
+}
+
+/// A loaded service with its lowercased name and description, built once
+/// per refresh so that filtering doesn't lowercase every row per keystroke
+struct SearchableService {
+    service: ServiceInfo,
+    search_key: String,
+}
+
+impl SearchableService {
+    fn new(service: ServiceInfo) -> Self {
+        let search_key = format!(
+            "{}\n{}",
+            service.name,
+            service.description.as_deref().unwrap_or("")
+        )
+        .to_lowercase();
+
+        Self {
+            service,
+            search_key,
+        }
+    }
+
+    /// Returns true if the service is in one of the `states` and its name or
+    /// description contains `query`, which must be lowercased, or its state
+    /// is `query`
+    fn matches(&self, query: &str, states: u32) -> bool {
+        self.service.matches_state(states)
+            && (query.is_empty() || self.search_key.contains(query) || self.is_in_state(query))
+    }
+
+    /// States are matched as whole words, so that "active" doesn't also
+    /// find every inactive service
+    fn is_in_state(&self, query: &str) -> bool {
+        self.service.status.as_str().eq_ignore_ascii_case(query)
+            || self.service.sub_state.eq_ignore_ascii_case(query)
+    }
+}
+
+/// State mask of the services shown with the "Show inactive" toggle in the
+/// given position
+fn visible_states(show_inactive: bool) -> u32 {
+    if show_inactive {
+        STATE_ALL
+    } else {
+        STATE_LISTED
+    }
+}
+
 pub struct SystemdPilotApp {
     window: ApplicationWindow,
     notebook: Notebook,
@@ -33,10 +120,96 @@ pub struct SystemdPilotApp {
     remote_services_list: TreeView,
     hosts_listbox: ListBox,
     show_inactive_button: CheckButton,
+    local_spinner: gtk4::Spinner,
+    local_search_entry: SearchEntry,
 
     // Tree stores
     local_services_store: TreeStore,
     remote_services_store: TreeStore,
+    local_service_rows: Rc<RefCell<HashMap<String, ServiceRow>>>,
+    local_services: Rc<RefCell<Vec<SearchableService>>>,
+    host_rows: Rc<RefCell<HashMap<String, (ListBoxRow, Label)>>>,
+    local_load_generation: Rc<Cell<u64>>,
+}
+
+/// Loads the local services list in the background. Cheap to clone into
+/// signal handlers that need to trigger a reload.
+#[derive(Clone)]
+struct LocalServicesLoader {
+    runtime: Arc<Runtime>,
+    service_manager: Arc<ServiceManager>,
+    store: TreeStore,
+    view: TreeView,
+    rows: Rc<RefCell<HashMap<String, ServiceRow>>>,
+    services: Rc<RefCell<Vec<SearchableService>>>,
+    spinner: gtk4::Spinner,
+    search_entry: SearchEntry,
+    generation: Rc<Cell<u64>>,
+}
+
+impl LocalServicesLoader {
+    /// Reloads the list on the user's request. Unit files may have been
+    /// installed or removed outside the app, so the cached unit file sets
+    /// are dropped and enumerated again along with the listing.
+    fn refresh(&self, show_inactive: bool) {
+        self.service_manager.invalidate_unit_caches();
+        self.load(show_inactive);
+    }
+
+    /// Lists the services, letting systemd drop inactive ones unless
+    /// `show_inactive` is set, and applies the result to the store
+    fn load(&self, show_inactive: bool) {
+        let loader = self.clone();
+        let service_manager = self.service_manager.clone();
+
+        // Only the most recent load may update the list
+        let generation = self.generation.get() + 1;
+        self.generation.set(generation);
+        self.spinner.start();
+
+        let listing = self
+            .runtime
+            .spawn(async move { service_manager.list_local_services(show_inactive).await });
+
+        // Await the listing on the main loop instead of polling for it from an
+        // idle handler, which kept the main loop spinning until systemctl returned
+        glib::spawn_future_local(async move {
+            let result = listing.await;
+            if loader.generation.get() != generation {
+                return;
+            }
+            loader.spinner.stop();
+
+            let services = match result {
+                Ok(Ok(services)) => services,
+                Ok(Err(e)) => {
+                    error!("Failed to list services: {}", e);
+                    return;
+                }
+                Err(e) => {
+                    error!("Service listing task failed: {}", e);
+                    return;
+                }
+            };
+
+            let mut cached_services = loader.services.borrow_mut();
+            *cached_services = services.into_iter().map(SearchableService::new).collect();
+
+            let query = loader.search_entry.text().to_lowercase();
+            let visible = filter_services(&cached_services, &query, visible_states(show_inactive));
+
+            let mut rows = loader.rows.borrow_mut();
+            if rows.is_empty() {
+                // Detach the model for the initial fill so the view handles
+                // one model swap instead of a row-inserted signal per service
+                loader.view.set_model(None::<&gtk4::TreeModel>);
+                sync_services_store(&loader.store, &mut rows, visible);
+                loader.view.set_model(Some(&loader.store));
+            } else {
+                sync_services_store(&loader.store, &mut rows, visible);
+            }
+        });
+    }
 }
 
 impl SystemdPilotApp {
@@ -72,8 +245,14 @@ impl SystemdPilotApp {
             remote_services_list: TreeView::new(),
             hosts_listbox: ListBox::new(),
             show_inactive_button: CheckButton::with_label("Show inactive services"),
+            local_spinner: gtk4::Spinner::new(),
+            local_search_entry: SearchEntry::new(),
             local_services_store,
             remote_services_store,
+            local_service_rows: Rc::new(RefCell::new(HashMap::new())),
+            local_services: Rc::new(RefCell::new(Vec::new())),
+            host_rows: Rc::new(RefCell::new(HashMap::new())),
+            local_load_generation: Rc::new(Cell::new(0)),
         }
     }
 
@@ -95,6 +274,13 @@ impl SystemdPilotApp {
 
         // Setup signal handlers
         self.setup_signal_handlers();
+
+        // Load services in the background; the window is usable meanwhile
+        self.refresh_local_services();
+
+        // Look up the terminal emulator off the main thread so the first
+        // "Follow" click doesn't wait for the probe
+        self.runtime.spawn_blocking(terminal_command);
     }
 
     fn setup_header_bar(&self) {
@@ -120,10 +306,11 @@ impl SystemdPilotApp {
         let refresh_button = Button::with_label("🔄");
         refresh_button.set_tooltip_text(Some("Refresh services"));
 
-        // TODO: Connect refresh button after refactoring to handle callbacks properly
-        // refresh_button.connect_clicked(move |_| {
-        //     // Need to refactor to properly handle self reference
-        // });
+        let loader = self.local_services_loader();
+        let show_inactive = self.show_inactive_button.clone();
+        refresh_button.connect_clicked(move |_| {
+            loader.refresh(show_inactive.is_active());
+        });
 
         header_bar.pack_start(&refresh_button);
 
@@ -155,25 +342,28 @@ impl SystemdPilotApp {
         // Control buttons
         let button_box = Box::new(gtk4::Orientation::Horizontal, 6);
 
-        let start_button = Button::with_label("▶ Start");
-        let stop_button = Button::with_label("⏹ Stop");
-        let restart_button = Button::with_label("🔄 Restart");
-        let enable_button = Button::with_label("✓ Enable");
-        let disable_button = Button::with_label("✗ Disable");
+        for &(label, verb, action) in SERVICE_ACTIONS {
+            let button = Button::with_label(label);
+            button_box.append(&button);
+            self.connect_local_action(&button, verb, action);
+        }
+
         let logs_button = Button::with_label("📋 Logs");
+        let follow_button = Button::with_label("📜 Follow");
 
-        button_box.append(&start_button);
-        button_box.append(&stop_button);
-        button_box.append(&restart_button);
-        button_box.append(&enable_button);
-        button_box.append(&disable_button);
         button_box.append(&logs_button);
+        button_box.append(&follow_button);
 
         // Show inactive services toggle
         button_box.append(&self.show_inactive_button);
+        button_box.append(&self.local_spinner);
 
         main_box.append(&button_box);
 
+        self.local_search_entry
+            .set_placeholder_text(Some("Search services..."));
+        main_box.append(&self.local_search_entry);
+
         // Services list
         self.setup_local_services_list();
         let scrolled = ScrolledWindow::new();
@@ -184,14 +374,7 @@ impl SystemdPilotApp {
         main_box.append(&scrolled);
 
         // Setup local service control signals
-        self.setup_local_service_signals(
-            &start_button,
-            &stop_button,
-            &restart_button,
-            &enable_button,
-            &disable_button,
-            &logs_button,
-        );
+        self.setup_local_service_signals(&logs_button, &follow_button);
 
         main_box
     }
@@ -233,18 +416,16 @@ impl SystemdPilotApp {
         // Remote service control buttons
         let remote_button_box = Box::new(gtk4::Orientation::Horizontal, 6);
 
-        let remote_start_button = Button::with_label("▶ Start");
-        let remote_stop_button = Button::with_label("⏹ Stop");
-        let remote_restart_button = Button::with_label("🔄 Restart");
-        let remote_enable_button = Button::with_label("✓ Enable");
-        let remote_disable_button = Button::with_label("✗ Disable");
+        // Same actions as the local page
+        let remote_action_buttons: Vec<Button> = SERVICE_ACTIONS
+            .iter()
+            .map(|&(label, _, _)| Button::with_label(label))
+            .collect();
         let remote_logs_button = Button::with_label("📋 Logs");
 
-        remote_button_box.append(&remote_start_button);
-        remote_button_box.append(&remote_stop_button);
-        remote_button_box.append(&remote_restart_button);
-        remote_button_box.append(&remote_enable_button);
-        remote_button_box.append(&remote_disable_button);
+        for button in &remote_action_buttons {
+            remote_button_box.append(button);
+        }
         remote_button_box.append(&remote_logs_button);
 
         services_box.append(&remote_button_box);
@@ -262,14 +443,7 @@ impl SystemdPilotApp {
 
         // Setup remote host signals
         self.setup_remote_host_signals(&add_host_button);
-        self.setup_remote_service_signals(
-            &remote_start_button,
-            &remote_stop_button,
-            &remote_restart_button,
-            &remote_enable_button,
-            &remote_disable_button,
-            &remote_logs_button,
-        );
+        self.setup_remote_service_signals(&remote_action_buttons, &remote_logs_button);
 
         {
             let wrapper_box = Box::new(gtk4::Orientation::Vertical, 0);
@@ -371,102 +545,168 @@ impl SystemdPilotApp {
     }
 
     fn setup_signal_handlers(&self) {
-        // Show inactive services toggle
-        let service_manager = self.service_manager.clone();
-        let local_store = self.local_services_store.clone();
-
+        // Show inactive services toggle; systemd does the state filtering
+        let loader = self.local_services_loader();
         self.show_inactive_button.connect_toggled(move |button| {
-            let show_inactive = button.is_active();
-            // Refresh local services with new filter
-            // This would need to be implemented in service_manager
+            loader.load(button.is_active());
         });
+
+        let store = self.local_services_store.clone();
+        let rows = self.local_service_rows.clone();
+        let services = self.local_services.clone();
+        let show_inactive = self.show_inactive_button.clone();
+
+        self.local_search_entry
+            .connect_search_changed(move |entry| {
+                let query = entry.text().to_lowercase();
+                sync_services_store(
+                    &store,
+                    &mut rows.borrow_mut(),
+                    filter_services(
+                        &services.borrow(),
+                        &query,
+                        visible_states(show_inactive.is_active()),
+                    ),
+                );
+            });
     }
 
-    fn setup_local_service_signals(
-        &self,
-        start_btn: &Button,
-        stop_btn: &Button,
-        restart_btn: &Button,
-        enable_btn: &Button,
-        disable_btn: &Button,
-        logs_btn: &Button,
-    ) {
+    fn setup_local_service_signals(&self, logs_btn: &Button, follow_btn: &Button) {
         let selection = self.local_services_list.selection();
 
-        // Start service
-        let service_manager = self.service_manager.clone();
-        let tree_selection = selection.clone();
-        start_btn.connect_clicked(move |_| {
-            if let Some(service_name) = get_selected_service_name(&tree_selection) {
-                // Implement start service logic
-                info!("Starting local service: {}", service_name);
-            }
-        });
-
-        // Stop service
-        let service_manager = self.service_manager.clone();
-        let tree_selection = selection.clone();
-        stop_btn.connect_clicked(move |_| {
-            if let Some(service_name) = get_selected_service_name(&tree_selection) {
-                info!("Stopping local service: {}", service_name);
-            }
-        });
-
-        // Restart service
-        let service_manager = self.service_manager.clone();
-        let tree_selection = selection.clone();
-        restart_btn.connect_clicked(move |_| {
-            if let Some(service_name) = get_selected_service_name(&tree_selection) {
-                info!("Restarting local service: {}", service_name);
-            }
-        });
-
-        // Enable service
+        // Show logs
+        let window = self.window.clone();
+        let runtime = self.runtime.clone();
         let service_manager = self.service_manager.clone();
         let tree_selection = selection.clone();
-        enable_btn.connect_clicked(move |_| {
+        logs_btn.connect_clicked(move |_| {
             if let Some(service_name) = get_selected_service_name(&tree_selection) {
-                info!("Enabling local service: {}", service_name);
+                let service_manager = service_manager.clone();
+                let name = service_name.clone();
+                let logs = runtime.spawn(async move {
+                    service_manager
+                        .get_service_logs(&name, Some(MAX_LOG_LINES))
+                        .await
+                });
+
+                let window = window.clone();
+                glib::spawn_future_local(async move {
+                    match logs.await {
+                        Ok(Ok(logs)) => show_service_logs_dialog(
+                            window.upcast_ref(),
+                            &service_name,
+                            &logs,
+                            None,
+                        ),
+                        Ok(Err(e)) => error!("Failed to get logs for {}: {}", service_name, e),
+                        Err(e) => error!("Log query task failed: {}", e),
+                    }
+                });
             }
         });
 
-        // Disable service
+        // Follow logs in a terminal
+        let runtime = self.runtime.clone();
         let service_manager = self.service_manager.clone();
         let tree_selection = selection.clone();
-        disable_btn.connect_clicked(move |_| {
+        follow_btn.connect_clicked(move |_| {
             if let Some(service_name) = get_selected_service_name(&tree_selection) {
-                info!("Disabling local service: {}", service_name);
+                // Answered from the cached unit file sets once services are
+                // listed, so repeated clicks don't query systemd
+                let service_manager = service_manager.clone();
+                let name = service_name.clone();
+                let journal = runtime
+                    .spawn(async move { service_manager.journal_command(&name, true).await });
+
+                let runtime = runtime.clone();
+                glib::spawn_future_local(async move {
+                    let journal = match journal.await {
+                        Ok(journal) => journal,
+                        Err(e) => {
+                            error!("Journal lookup task failed: {}", e);
+                            return;
+                        }
+                    };
+                    let command = [journal, &[service_name.as_str()]].concat();
+
+                    if let Err(e) = spawn_in_terminal(runtime.handle(), &command).await {
+                        error!("Failed to follow logs for {}: {}", service_name, e);
+                    }
+                });
             }
         });
+    }
 
-        // Show logs
+    /// Runs `action` on the selected local service when `button` is clicked,
+    /// then updates that service's row from a fresh status query
+    fn connect_local_action(&self, button: &Button, verb: &'static str, action: LocalAction) {
+        let selection = self.local_services_list.selection();
         let window = self.window.clone();
-        let tree_selection = selection.clone();
-        logs_btn.connect_clicked(move |_| {
-            if let Some(service_name) = get_selected_service_name(&tree_selection) {
-                show_service_logs_dialog(&window, &service_name, None);
-            }
+        let runtime = self.runtime.clone();
+        let service_manager = self.service_manager.clone();
+        let store = self.local_services_store.clone();
+        let rows = self.local_service_rows.clone();
+        let services = self.local_services.clone();
+        let search_entry = self.local_search_entry.clone();
+        let show_inactive = self.show_inactive_button.clone();
+
+        button.connect_clicked(move |_| {
+            let Some(service_name) = get_selected_service_name(&selection) else {
+                return;
+            };
+            info!("{} local service: {}", verb, service_name);
+
+            let service_manager = service_manager.clone();
+            let name = service_name.clone();
+            let task = runtime.spawn(async move {
+                // Resolve the manager once, so the action and the status
+                // query that follows it talk to the same one
+                let user = service_manager.is_user_service(&name).await;
+                action(service_manager.clone(), name.clone(), user).await?;
+                service_manager.get_service_status(&name, user).await
+            });
+
+            let window = window.clone();
+            let store = store.clone();
+            let rows = rows.clone();
+            let services = services.clone();
+            let search_entry = search_entry.clone();
+            let show_inactive = show_inactive.clone();
+            glib::spawn_future_local(async move {
+                match task.await {
+                    Ok(Ok(service)) => update_local_service(
+                        &store,
+                        &mut rows.borrow_mut(),
+                        &mut services.borrow_mut(),
+                        service,
+                        &search_entry.text().to_lowercase(),
+                        visible_states(show_inactive.is_active()),
+                    ),
+                    Ok(Err(e)) => {
+                        error!("{} {} failed: {}", verb, service_name, e);
+                        show_error_dialog(
+                            window.upcast_ref(),
+                            "Service action failed",
+                            &e.to_string(),
+                        );
+                    }
+                    Err(e) => error!("Service action task failed: {}", e),
+                }
+            });
         });
     }
 
     fn setup_remote_host_signals(&self, add_host_btn: &Button) {
         let window = self.window.clone();
         let remote_hosts = self.remote_hosts.clone();
+        let runtime = self.runtime.clone();
 
         add_host_btn.connect_clicked(move |_| {
-            show_add_host_dialog(&window, &remote_hosts);
+            show_add_host_dialog(&window, &remote_hosts, &runtime);
         });
     }
 
-    fn setup_remote_service_signals(
-        &self,
-        start_btn: &Button,
-        stop_btn: &Button,
-        restart_btn: &Button,
-        enable_btn: &Button,
-        disable_btn: &Button,
-        logs_btn: &Button,
-    ) {
+    fn setup_remote_service_signals(&self, action_buttons: &[Button], logs_btn: &Button) {
         let selection = self.remote_services_list.selection();
 
         // Similar to local service signals but for remote services
@@ -483,51 +723,48 @@ impl SystemdPilotApp {
     }
 
     fn load_hosts_from_config(&self) -> Result<HashMap<String, RemoteHost>> {
-        let config_dir =
-            dirs::config_dir().ok_or_else(|| anyhow!("Could not find config directory"))?;
-        let config_file = config_dir.join("systemd-pilot").join("hosts.json");
-
-        if !config_file.exists() {
-            return Ok(HashMap::new());
-        }
-
-        let content = std::fs::read_to_string(&config_file)?;
+        let content = match std::fs::read_to_string(hosts_config_file()?) {
+            Ok(content) => content,
+            Err(e) if e.kind() == std::io::ErrorKind::NotFound => return Ok(HashMap::new()),
+            Err(e) => return Err(e.into()),
+        };
         let hosts: HashMap<String, RemoteHost> = serde_json::from_str(&content)?;
         Ok(hosts)
     }
 
-    pub fn save_hosts(&self) -> Result<()> {
-        let config_dir =
-            dirs::config_dir().ok_or_else(|| anyhow!("Could not find config directory"))?;
-        let app_config_dir = config_dir.join("systemd-pilot");
-        std::fs::create_dir_all(&app_config_dir)?;
-
-        let config_file = app_config_dir.join("hosts.json");
+    fn refresh_hosts_list(&self) {
         let hosts = self.remote_hosts.borrow();
-        let content = serde_json::to_string_pretty(&*hosts)?;
-        std::fs::write(&config_file, content)?;
+        let mut rows = self.host_rows.borrow_mut();
 
-        Ok(())
-    }
+        // Update the existing rows in place rather than rebuilding the list
+        rows.retain(|name, (row, _)| {
+            let keep = hosts.contains_key(name);
+            if !keep {
+                self.hosts_listbox.remove(row);
+            }
+            keep
+        });
 
-    fn refresh_hosts_list(&self) {
-        // Clear existing hosts in UI
-        // Clear existing items
-        while let Some(child) = self.hosts_listbox.first_child() {
-            self.hosts_listbox.remove(&child);
-        }
+        let mut names: Vec<&String> = hosts.keys().collect();
+        names.sort_unstable();
+
+        for (position, name) in names.into_iter().enumerate() {
+            let host = &hosts[name];
+            let markup = format!("<b>{}</b>\n{}@{}", name, host.username, host.hostname);
+
+            if let Some((_, label)) = rows.get(name) {
+                if label.label().as_str() != markup.as_str() {
+                    label.set_markup(&markup);
+                }
+                continue;
+            }
 
-        // Add hosts to UI
-        let hosts = self.remote_hosts.borrow();
-        for (name, host) in hosts.iter() {
             let row = ListBoxRow::new();
-            let label = Label::new(Some(&format!("{}@{}", host.username, host.hostname)));
-            label.set_markup(&format!(
-                "<b>{}</b>\n{}@{}",
-                name, host.username, host.hostname
-            ));
+            let label = Label::new(None);
+            label.set_markup(&markup);
             row.set_child(Some(&label));
-            self.hosts_listbox.append(&row);
+            self.hosts_listbox.insert(&row, position as i32);
+            rows.insert(name.clone(), (row, label));
         }
 
         self.hosts_listbox.show();
@@ -539,44 +776,22 @@ impl SystemdPilotApp {
     }
 
     fn refresh_local_services(&self) {
-        let runtime = self.runtime.clone();
-        let service_manager = self.service_manager.clone();
-        let store = self.local_services_store.clone();
-        let show_inactive = self.show_inactive_button.is_active();
-
-        let (sender, receiver) = std::sync::mpsc::channel();
-
-        runtime.spawn(async move {
-            match service_manager.list_local_services(show_inactive).await {
-                Ok(services) => {
-                    sender.send(services).expect("Failed to send services");
-                }
-                Err(e) => {
-                    error!("Failed to list services: {}", e);
-                }
-            }
-        });
+        self.local_services_loader()
+            .load(self.show_inactive_button.is_active());
+    }
 
-        glib::idle_add_local(move || match receiver.try_recv() {
-            Ok(services) => {
-                store.clear();
-                for service in services {
-                    store.insert_with_values(
-                        None,
-                        None,
-                        &[
-                            (0, &service.name),
-                            (1, &service.status.to_string()),
-                            (2, &service.enabled.to_string()),
-                            (3, &service.description.as_deref().unwrap_or("")),
-                        ],
-                    );
-                }
-                glib::ControlFlow::Break
-            }
-            Err(std::sync::mpsc::TryRecvError::Empty) => glib::ControlFlow::Continue,
-            Err(std::sync::mpsc::TryRecvError::Disconnected) => glib::ControlFlow::Break,
-        });
+    fn local_services_loader(&self) -> LocalServicesLoader {
+        LocalServicesLoader {
+            runtime: self.runtime.clone(),
+            service_manager: self.service_manager.clone(),
+            store: self.local_services_store.clone(),
+            view: self.local_services_list.clone(),
+            rows: self.local_service_rows.clone(),
+            services: self.local_services.clone(),
+            spinner: self.local_spinner.clone(),
+            search_entry: self.local_search_entry.clone(),
+            generation: self.local_load_generation.clone(),
+        }
     }
 
     fn refresh_remote_services(&self) {
@@ -585,47 +800,181 @@ impl SystemdPilotApp {
     }
 }
 
-fn get_selected_service_name(selection: &TreeSelection) -> Option<String> {
-    if let Some((model, iter)) = selection.selected() {
-        model.get_value(&iter, 0).get::<String>().ok()
-    } else {
-        None
+/// Returns the services in one of the `states` that match `query`, which
+/// must already be lowercased
+fn filter_services<'a>(
+    services: &'a [SearchableService],
+    query: &'a str,
+    states: u32,
+) -> impl Iterator<Item = &'a ServiceInfo> {
+    services
+        .iter()
+        .filter(move |entry| entry.matches(query, states))
+        .map(|entry| &entry.service)
+}
+
+/// Brings the store in line with a service list. Only the differences are
+/// applied: rows for services no longer listed are removed, new services are
+/// inserted in list order and rows are rewritten only if their state changed.
+fn sync_services_store<'a>(
+    store: &TreeStore,
+    rows: &mut HashMap<String, ServiceRow>,
+    services: impl IntoIterator<Item = &'a ServiceInfo>,
+) {
+    let mut seen = HashSet::with_capacity(rows.len());
+    let mut previous: Option<TreeIter> = None;
+
+    for service in services {
+        seen.insert(service.name.as_str());
+
+        if let Some(row) = rows.get_mut(&service.name) {
+            update_service_row(store, row, service);
+            previous = Some(row.iter.clone());
+            continue;
+        }
+
+        let iter = store.insert_after(None, previous.as_ref());
+        store.set(
+            &iter,
+            &[
+                (0, &service.name),
+                (1, &service.status.as_str()),
+                (2, &service.description.as_deref().unwrap_or("")),
+            ],
+        );
+        previous = Some(iter.clone());
+        rows.insert(
+            service.name.clone(),
+            ServiceRow {
+                iter,
+                status: service.status.clone(),
+                description: service.description.clone(),
+            },
+        );
     }
+
+    rows.retain(|name, row| {
+        if seen.contains(name.as_str()) {
+            true
+        } else {
+            store.remove(&row.iter);
+            false
+        }
+    });
 }
 
-fn show_service_logs_dialog(parent: &ApplicationWindow, service_name: &str, host: Option<&str>) {
-    let dialog = Dialog::with_buttons(
-        Some(&format!("Logs for {}", service_name)),
-        Some(parent),
-        DialogFlags::MODAL | DialogFlags::DESTROY_WITH_PARENT,
-        &[("Close", ResponseType::Close)],
-    );
+/// Saves the hosts to the config file on the runtime, so the main loop
+/// never waits on the disk. The file is replaced through a rename, and a
+/// failure is reported in an error dialog on `parent`.
+fn save_hosts(runtime: &Runtime, parent: &ApplicationWindow, hosts: &HashMap<String, RemoteHost>) {
+    let content = match serde_json::to_vec_pretty(hosts) {
+        Ok(content) => content,
+        Err(e) => {
+            error!("Failed to serialize hosts: {}", e);
+            return;
+        }
+    };
 
-    dialog.set_default_size(800, 600);
+    let write = runtime.spawn(async move {
+        let config_file = hosts_config_file()?;
+        if let Some(app_config_dir) = config_file.parent() {
+            tokio::fs::create_dir_all(app_config_dir).await?;
+        }
 
-    let scrolled = ScrolledWindow::new();
-    scrolled.set_policy(gtk4::PolicyType::Automatic, gtk4::PolicyType::Automatic);
+        let temp_file = config_file.with_extension("json.tmp");
+        tokio::fs::write(&temp_file, content).await?;
+        tokio::fs::rename(&temp_file, config_file).await?;
+        Ok::<_, anyhow::Error>(())
+    });
 
-    let text_view = TextView::new();
-    text_view.set_editable(false);
-    text_view.set_cursor_visible(false);
+    let parent = parent.clone();
+    glib::spawn_future_local(async move {
+        let result = match write.await {
+            Ok(result) => result,
+            Err(e) => Err(e.into()),
+        };
 
-    // Set monospace font
-    let font_desc = pango::FontDescription::from_string("monospace");
-    text_view.set_monospace(true);
+        if let Err(e) = result {
+            error!("Failed to save hosts: {}", e);
+            show_error_dialog(parent.upcast_ref(), "Failed to save hosts", &e.to_string());
+        }
+    });
+}
 
-    scrolled.set_child(Some(&text_view));
+/// Path of the saved hosts file. The config directory can't change while the
+/// app is running, so it is only looked up once.
+fn hosts_config_file() -> Result<&'static Path> {
+    static HOSTS_CONFIG_FILE: OnceLock<Option<PathBuf>> = OnceLock::new();
 
-    let content_area = dialog.content_area();
-    content_area.append(&scrolled);
+    HOSTS_CONFIG_FILE
+        .get_or_init(|| dirs::config_dir().map(|dir| dir.join("systemd-pilot").join("hosts.json")))
+        .as_deref()
+        .ok_or_else(|| anyhow!("Could not find config directory"))
+}
 
-    dialog.show();
-    dialog.close();
+/// Rewrites a row's columns if the service's state changed since it was
+/// last rendered
+fn update_service_row(store: &TreeStore, row: &mut ServiceRow, service: &ServiceInfo) {
+    if row.status == service.status && row.description == service.description {
+        return;
+    }
+
+    store.set(
+        &row.iter,
+        &[
+            (1, &service.status.as_str()),
+            (2, &service.description.as_deref().unwrap_or("")),
+        ],
+    );
+    row.status = service.status.clone();
+    row.description = service.description.clone();
+}
+
+/// Applies a fresh status for a single service to the cached list and to
+/// its row, found by binary search of the name-sorted list and through the
+/// name index, so an action never walks the whole store. Only if the service
+/// now enters or leaves the filtered view is the store re-synced.
+fn update_local_service(
+    store: &TreeStore,
+    rows: &mut HashMap<String, ServiceRow>,
+    services: &mut [SearchableService],
+    service: ServiceInfo,
+    query: &str,
+    states: u32,
+) {
+    let Ok(index) = services.binary_search_by(|entry| entry.service.name.cmp(&service.name)) else {
+        // Not a listed service; keep whatever row it has up to date
+        if let Some(row) = rows.get_mut(&service.name) {
+            update_service_row(store, row, &service);
+        }
+        return;
+    };
+
+    services[index] = SearchableService::new(service);
+    let entry = &services[index];
+
+    match (
+        rows.get_mut(&entry.service.name),
+        entry.matches(query, states),
+    ) {
+        (Some(row), true) => update_service_row(store, row, &entry.service),
+        (None, false) => {}
+        _ => sync_services_store(store, rows, filter_services(services, query, states)),
+    }
+}
+
+fn get_selected_service_name(selection: &TreeSelection) -> Option<String> {
+    if let Some((model, iter)) = selection.selected() {
+        model.get_value(&iter, 0).get::<String>().ok()
+    } else {
+        None
+    }
 }
 
 fn show_add_host_dialog(
     parent: &ApplicationWindow,
     remote_hosts: &Rc<RefCell<HashMap<String, RemoteHost>>>,
+    runtime: &Arc<Runtime>,
 ) {
     let dialog = Dialog::with_buttons(
         Some("Add Remote Host"),
@@ -673,6 +1022,8 @@ fn show_add_host_dialog(
     content_area.append(&grid);
 
     let remote_hosts_clone = remote_hosts.clone();
+    let parent = parent.clone();
+    let runtime = runtime.clone();
     dialog.connect_response(move |dialog, response| {
         if response == ResponseType::Ok {
             let name = name_entry.text().to_string();
@@ -692,7 +1043,9 @@ fn show_add_host_dialog(
                     auth_type,
                 };
 
-                remote_hosts_clone.borrow_mut().insert(name, host);
+                let mut hosts = remote_hosts_clone.borrow_mut();
+                hosts.insert(name, host);
+                save_hosts(&runtime, &parent, &hosts);
             }
         }
         dialog.close();
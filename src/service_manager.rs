@@ -1,13 +1,46 @@
 use anyhow::{anyhow, Result};
 use log::{debug, error, info, warn};
 use serde::{Deserialize, Serialize};
-use std::collections::HashMap;
+use std::collections::{HashMap, HashSet};
 use std::fmt;
 use std::process::{Command, Stdio};
-use std::sync::Arc;
-use tokio::process::Command as TokioCommand;
+use std::sync::{Arc, Mutex};
+use tokio::io::{AsyncBufReadExt, AsyncWriteExt, BufReader};
+use tokio::process::{Child, ChildStdin, ChildStdout};
 use tokio::runtime::Runtime;
 
+use crate::utils::host_command;
+
+/// Command used to start the shared root shell
+const PRIVILEGED_SHELL: &[&str] = &["pkexec", "sh"];
+
+/// Printed by the privileged shell after each command, followed by its status
+const DONE_MARKER: &str = "__systemd_pilot_done__";
+
+/// Properties read by `systemctl show` when querying service state
+const SHOW_PROPERTIES: &str =
+    "--property=Id,Description,LoadState,ActiveState,SubState,UnitFileState";
+
+/// Unit states listed by `systemctl list-units` when --all isn't given
+const LISTED_STATES: &str = "--state=active,reloading,activating,deactivating,failed";
+
+/// Reloads the system and user managers in one shell rather than two spawns
+const DAEMON_RELOAD_SCRIPT: &str = "systemctl daemon-reload && systemctl --user daemon-reload";
+
+/// Installs the unit file read from stdin at `$1` and reloads the system
+/// manager, for the one-off pkexec used when the privileged shell is lost
+const INSTALL_UNIT_SCRIPT: &str = "install -m 644 /dev/stdin \"$1\" && systemctl daemon-reload";
+
+/// `journalctl` invocations that select a unit, followed by the service name,
+/// indexed by `[follow][user]`
+const JOURNAL_COMMANDS: [[&[&str]; 2]; 2] = [
+    [&["journalctl", "-u"], &["journalctl", "--user", "-u"]],
+    [
+        &["journalctl", "-f", "-u"],
+        &["journalctl", "--user", "-f", "-u"],
+    ],
+];
+
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct ServiceInfo {
     pub name: String,
@@ -17,6 +50,59 @@ pub struct ServiceInfo {
     pub active: bool,
     pub load_state: String,
     pub sub_state: String,
+    #[serde(default)]
+    pub state_mask: u32,
+}
+
+impl ServiceInfo {
+    /// Returns true if any of the service's state bits are set in `mask`
+    pub fn matches_state(&self, mask: u32) -> bool {
+        self.state_mask & mask != 0
+    }
+}
+
+// Active state bits
+pub const STATE_ACTIVE: u32 = 1 << 0;
+pub const STATE_INACTIVE: u32 = 1 << 1;
+pub const STATE_FAILED: u32 = 1 << 2;
+pub const STATE_ACTIVATING: u32 = 1 << 3;
+pub const STATE_DEACTIVATING: u32 = 1 << 4;
+pub const STATE_UNKNOWN: u32 = 1 << 5;
+pub const STATE_RELOADING: u32 = 1 << 6;
+
+// Sub state bits
+pub const STATE_RUNNING: u32 = 1 << 8;
+pub const STATE_EXITED: u32 = 1 << 9;
+pub const STATE_DEAD: u32 = 1 << 10;
+pub const STATE_WAITING: u32 = 1 << 11;
+
+pub const STATE_ALL: u32 = u32::MAX;
+
+/// The states in `LISTED_STATES`, shown while inactive services are hidden
+pub const STATE_LISTED: u32 =
+    STATE_ACTIVE | STATE_RELOADING | STATE_ACTIVATING | STATE_DEACTIVATING | STATE_FAILED;
+
+/// Encodes active and sub state strings as a bitmask once at parse time, so
+/// filtering a service list is an integer AND per row instead of string compares
+pub fn state_mask(active_state: &str, sub_state: &str) -> u32 {
+    let active = match active_state {
+        "active" => STATE_ACTIVE,
+        "inactive" => STATE_INACTIVE,
+        "failed" => STATE_FAILED,
+        "activating" => STATE_ACTIVATING,
+        "deactivating" => STATE_DEACTIVATING,
+        "reloading" => STATE_RELOADING,
+        _ => STATE_UNKNOWN,
+    };
+    let sub = match sub_state {
+        "running" => STATE_RUNNING,
+        "exited" => STATE_EXITED,
+        "dead" => STATE_DEAD,
+        "waiting" => STATE_WAITING,
+        _ => 0,
+    };
+
+    active | sub
 }
 
 #[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
@@ -27,17 +113,24 @@ pub enum ServiceStatus {
     Unknown,
 }
 
-impl fmt::Display for ServiceStatus {
-    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+impl ServiceStatus {
+    /// The status as shown in the UI, without allocating a string
+    pub fn as_str(&self) -> &'static str {
         match self {
-            ServiceStatus::Active => write!(f, "Active"),
-            ServiceStatus::Inactive => write!(f, "Inactive"),
-            ServiceStatus::Failed => write!(f, "Failed"),
-            ServiceStatus::Unknown => write!(f, "Unknown"),
+            ServiceStatus::Active => "Active",
+            ServiceStatus::Inactive => "Inactive",
+            ServiceStatus::Failed => "Failed",
+            ServiceStatus::Unknown => "Unknown",
         }
     }
 }
 
+impl fmt::Display for ServiceStatus {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.write_str(self.as_str())
+    }
+}
+
 impl From<&str> for ServiceStatus {
     fn from(status: &str) -> Self {
         match status.to_lowercase().as_str() {
@@ -49,26 +142,273 @@ impl From<&str> for ServiceStatus {
     }
 }
 
+/// A root shell started through pkexec on first use and kept alive, so a
+/// session of privileged operations only asks for authentication once
+struct PrivilegedShell {
+    child: Child,
+    stdin: ChildStdin,
+    stdout: BufReader<ChildStdout>,
+    authenticated: bool,
+}
+
+impl PrivilegedShell {
+    fn spawn(command: &[&str]) -> Result<Self> {
+        let mut child = host_command(command[0])
+            .args(&command[1..])
+            .stdin(Stdio::piped())
+            .stdout(Stdio::piped())
+            .stderr(Stdio::null())
+            .spawn()?;
+
+        let stdin = child
+            .stdin
+            .take()
+            .ok_or_else(|| anyhow!("Privileged shell has no stdin"))?;
+        let stdout = child
+            .stdout
+            .take()
+            .ok_or_else(|| anyhow!("Privileged shell has no stdout"))?;
+
+        Ok(Self {
+            child,
+            stdin,
+            stdout: BufReader::new(stdout),
+            authenticated: false,
+        })
+    }
+
+    /// Runs `script` and returns its exit status and what it wrote to
+    /// stderr. Errors mean the shell itself is gone, e.g. because
+    /// authentication was refused.
+    async fn run(&mut self, script: &str) -> Result<(i32, String)> {
+        // Commands must not read the shell's stdin, which carries our scripts.
+        // Their stderr is sent down the pipe and their stdout is dropped. The
+        // marker is preceded by a newline so that it starts its own line even
+        // if the stderr output doesn't end with one.
+        let request = format!(
+            "{{ {}\n}} < /dev/null 2>&1 >/dev/null\nprintf '\\n%s %d\\n' {} \"$?\"\n",
+            script, DONE_MARKER
+        );
+        let sent = async {
+            self.stdin.write_all(request.as_bytes()).await?;
+            self.stdin.flush().await
+        }
+        .await;
+
+        if sent.is_ok() {
+            let mut stderr = String::new();
+            let mut line = String::new();
+            loop {
+                line.clear();
+                if self.stdout.read_line(&mut line).await? == 0 {
+                    break;
+                }
+
+                if let Some(status) = line.strip_prefix(DONE_MARKER) {
+                    self.authenticated = true;
+                    // Drop the newline written in front of the marker
+                    stderr.pop();
+                    return Ok((status.trim().parse()?, stderr));
+                }
+                stderr.push_str(&line);
+            }
+        }
+
+        Err(self.exit_error().await)
+    }
+
+    /// Describes why the shell went away. pkexec exits with 126 or 127 when
+    /// authentication is refused or dismissed.
+    async fn exit_error(&mut self) -> anyhow::Error {
+        match self.child.wait().await {
+            Ok(status) if !self.authenticated && matches!(status.code(), Some(126 | 127)) => {
+                AuthorizationRefused.into()
+            }
+            Ok(status) => anyhow!("Privileged shell exited: {}", status),
+            Err(e) => e.into(),
+        }
+    }
+}
+
+/// Returned when the user refuses or dismisses the pkexec authentication
+/// prompt, so callers don't retry with another prompt
+#[derive(Debug)]
+pub struct AuthorizationRefused;
+
+impl fmt::Display for AuthorizationRefused {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.write_str("Authorization refused")
+    }
+}
+
+impl std::error::Error for AuthorizationRefused {}
+
+/// Quotes `value` for use as a single POSIX shell word
+fn shell_quote(value: &str) -> String {
+    format!("'{}'", value.replace('\'', "'\\''"))
+}
+
+/// The stderr of a failed privileged command, or its exit status if it
+/// printed nothing
+fn failure_detail(status: i32, stderr: &str) -> String {
+    match stderr.trim() {
+        "" => format!("exit status {}", status),
+        message => message.to_string(),
+    }
+}
+
+/// Builds a script that replaces `path` with `content` through a temporary
+/// file in the same directory, so a failed write never leaves a truncated
+/// unit behind. The umask gives the file its final 644 mode on creation and
+/// is set in a subshell so it doesn't leak into the privileged shell.
+fn atomic_write_script(path: &str, content: &str) -> String {
+    let target = shell_quote(path);
+    let temp = shell_quote(&format!("{}.tmp", path));
+    format!(
+        "(umask 022 && printf '%s' {} > {} && mv -f {} {}) || {{ rm -f {}; false; }}",
+        shell_quote(content),
+        temp,
+        temp,
+        target,
+        temp
+    )
+}
+
 pub struct ServiceManager {
     runtime: Arc<Runtime>,
+    privileged_shell: tokio::sync::Mutex<Option<PrivilegedShell>>,
+    // Unit files known to the system and user managers, enumerated once on first use
+    system_unit_files: Mutex<Option<HashSet<String>>>,
+    user_unit_files: Mutex<Option<HashSet<String>>>,
 }
 
 impl ServiceManager {
     pub fn new(runtime: Arc<Runtime>) -> Self {
-        Self { runtime }
+        Self {
+            runtime,
+            privileged_shell: tokio::sync::Mutex::new(None),
+            system_unit_files: Mutex::new(None),
+            user_unit_files: Mutex::new(None),
+        }
+    }
+
+    /// Returns true if the service is installed for the user manager and
+    /// not for the system one. Both checks are lookups in unit file sets that
+    /// are filled when services are listed and kept until the next explicit
+    /// refresh or daemon-reload.
+    pub async fn is_user_service(&self, service_name: &str) -> bool {
+        let lookup = async {
+            Ok::<_, anyhow::Error>(
+                !self.has_unit_file(false, service_name).await?
+                    && self.has_unit_file(true, service_name).await?,
+            )
+        };
+
+        match lookup.await {
+            Ok(is_user) => is_user,
+            Err(e) => {
+                warn!("Failed to list unit files: {}", e);
+                false
+            }
+        }
+    }
+
+    /// Drops cached unit lookups so they are re-read from systemd
+    pub fn invalidate_unit_caches(&self) {
+        *self.system_unit_files.lock().unwrap() = None;
+        *self.user_unit_files.lock().unwrap() = None;
+    }
+
+    fn unit_files_cache(&self, user: bool) -> &Mutex<Option<HashSet<String>>> {
+        if user {
+            &self.user_unit_files
+        } else {
+            &self.system_unit_files
+        }
+    }
+
+    /// Fills the unit file set of the system or user manager unless it is
+    /// already cached. Listing with another state filter doesn't change the
+    /// installed unit files, so it doesn't enumerate them again.
+    async fn prefetch_unit_files(&self, user: bool) {
+        if self.unit_files_cache(user).lock().unwrap().is_some() {
+            return;
+        }
+
+        match self.list_unit_files(user).await {
+            Ok(units) => *self.unit_files_cache(user).lock().unwrap() = Some(units),
+            Err(e) => warn!("Failed to list unit files: {}", e),
+        }
+    }
+
+    /// Looks up a service by name, without the `.service` suffix, so that
+    /// callers can pass the row's name as is
+    async fn has_unit_file(&self, user: bool, service_name: &str) -> Result<bool> {
+        let cache = self.unit_files_cache(user);
+        if let Some(units) = cache.lock().unwrap().as_ref() {
+            return Ok(units.contains(service_name));
+        }
+
+        let units = self.list_unit_files(user).await?;
+        let found = units.contains(service_name);
+        *cache.lock().unwrap() = Some(units);
+
+        Ok(found)
+    }
+
+    /// Asks the system or user manager for its service unit files, which
+    /// covers every unit directory without a stat per lookup. Names are kept
+    /// without the `.service` suffix, as services are named everywhere else.
+    async fn list_unit_files(&self, user: bool) -> Result<HashSet<String>> {
+        let mut cmd = host_command("systemctl");
+        if user {
+            cmd.arg("--user");
+        }
+
+        let output = cmd
+            .args(&[
+                "list-unit-files",
+                "--type=service",
+                "--no-pager",
+                "--no-legend",
+                "--plain",
+            ])
+            .stdout(Stdio::piped())
+            .stderr(Stdio::piped())
+            .output()
+            .await?;
+
+        if !output.status.success() {
+            let stderr = String::from_utf8_lossy(&output.stderr);
+            return Err(anyhow!("Failed to list unit files: {}", stderr));
+        }
+
+        Ok(self.parse_unit_file_names(&String::from_utf8_lossy(&output.stdout)))
     }
 
     pub async fn list_local_services(&self, show_inactive: bool) -> Result<Vec<ServiceInfo>> {
-        let mut cmd = TokioCommand::new("systemctl");
-        cmd.args(&["list-units", "--type=service", "--no-pager"])
+        // A single `systemctl show` over all loaded services returns the
+        // state, description and enablement that list-units can't provide
+        let mut cmd = host_command("systemctl");
+        cmd.args(&["show", SHOW_PROPERTIES, "--no-pager"])
             .stdout(Stdio::piped())
             .stderr(Stdio::piped());
 
-        if show_inactive {
-            cmd.arg("--all");
+        // Without --all, list only what `systemctl list-units` would show
+        if !show_inactive {
+            cmd.arg(LISTED_STATES);
         }
 
-        let output = cmd.output().await?;
+        cmd.args(&["--", "*.service"]);
+
+        // Enumerate the system and user unit files alongside, so that the
+        // per-action user/system checks never have to spawn systemctl themselves
+        let (output, _, _) = tokio::join!(
+            cmd.output(),
+            self.prefetch_unit_files(false),
+            self.prefetch_unit_files(true)
+        );
+        let output = output?;
 
         if !output.status.success() {
             let stderr = String::from_utf8_lossy(&output.stderr);
@@ -76,12 +416,22 @@ impl ServiceManager {
         }
 
         let stdout = String::from_utf8_lossy(&output.stdout);
-        self.parse_service_list(&stdout)
+        let mut services = self.parse_service_records(&stdout);
+        services.sort_unstable_by(|a, b| a.name.cmp(&b.name));
+
+        Ok(services)
     }
 
-    pub async fn get_service_status(&self, service_name: &str) -> Result<ServiceInfo> {
-        let cmd = TokioCommand::new("systemctl")
-            .args(&["show", service_name, "--no-pager"])
+    /// Reads the state of a service from the user manager if `user` is set,
+    /// as resolved by `is_user_service`, or from the system manager otherwise
+    pub async fn get_service_status(&self, service_name: &str, user: bool) -> Result<ServiceInfo> {
+        let mut cmd = host_command("systemctl");
+        if user {
+            cmd.arg("--user");
+        }
+
+        let cmd = cmd
+            .args(&["show", SHOW_PROPERTIES, "--no-pager", "--", service_name])
             .stdout(Stdio::piped())
             .stderr(Stdio::piped())
             .output()
@@ -96,33 +446,51 @@ impl ServiceManager {
         self.parse_service_status(service_name, &stdout)
     }
 
-    pub async fn start_service(&self, service_name: &str) -> Result<()> {
-        self.run_systemctl_command(&["start", service_name]).await
+    pub async fn start_service(&self, service_name: &str, user: bool) -> Result<()> {
+        self.run_systemctl_command(user, &["start", service_name])
+            .await
     }
 
-    pub async fn stop_service(&self, service_name: &str) -> Result<()> {
-        self.run_systemctl_command(&["stop", service_name]).await
+    pub async fn stop_service(&self, service_name: &str, user: bool) -> Result<()> {
+        self.run_systemctl_command(user, &["stop", service_name])
+            .await
     }
 
-    pub async fn restart_service(&self, service_name: &str) -> Result<()> {
-        self.run_systemctl_command(&["restart", service_name]).await
+    pub async fn restart_service(&self, service_name: &str, user: bool) -> Result<()> {
+        self.run_systemctl_command(user, &["restart", service_name])
+            .await
     }
 
-    pub async fn enable_service(&self, service_name: &str) -> Result<()> {
-        self.run_systemctl_command(&["enable", service_name]).await
+    pub async fn enable_service(&self, service_name: &str, user: bool) -> Result<()> {
+        self.run_systemctl_command(user, &["enable", service_name])
+            .await
     }
 
-    pub async fn disable_service(&self, service_name: &str) -> Result<()> {
-        self.run_systemctl_command(&["disable", service_name]).await
+    pub async fn disable_service(&self, service_name: &str, user: bool) -> Result<()> {
+        self.run_systemctl_command(user, &["disable", service_name])
+            .await
+    }
+
+    pub async fn reload_service(&self, service_name: &str, user: bool) -> Result<()> {
+        self.run_systemctl_command(user, &["reload", service_name])
+            .await
     }
 
-    pub async fn reload_service(&self, service_name: &str) -> Result<()> {
-        self.run_systemctl_command(&["reload", service_name]).await
+    /// Returns the `journalctl` command, without the service name, that
+    /// reads or follows the journal of the system or user service
+    pub async fn journal_command(
+        &self,
+        service_name: &str,
+        follow: bool,
+    ) -> &'static [&'static str] {
+        let user = self.is_user_service(service_name).await;
+        JOURNAL_COMMANDS[follow as usize][user as usize]
     }
 
     pub async fn get_service_logs(&self, service_name: &str, lines: Option<u32>) -> Result<String> {
-        let mut cmd = TokioCommand::new("journalctl");
-        cmd.args(&["-u", service_name, "--no-pager"]);
+        let journal = self.journal_command(service_name, false).await;
+        let mut cmd = host_command(journal[0]);
+        cmd.args(&journal[1..]).args(&[service_name, "--no-pager"]);
 
         if let Some(n) = lines {
             cmd.args(&["-n", &n.to_string()]);
@@ -142,24 +510,93 @@ impl ServiceManager {
         Ok(String::from_utf8_lossy(&output.stdout).to_string())
     }
 
+    /// Reloads both the system and the user manager with a single spawn
     pub async fn daemon_reload(&self) -> Result<()> {
-        self.run_systemctl_command(&["daemon-reload"]).await
+        let output = host_command("sh")
+            .args(&["-c", DAEMON_RELOAD_SCRIPT])
+            .stdout(Stdio::null())
+            .stderr(Stdio::piped())
+            .output()
+            .await?;
+
+        if !output.status.success() {
+            let stderr = String::from_utf8_lossy(&output.stderr);
+            return Err(anyhow!("Failed to reload systemd: {}", stderr));
+        }
+
+        self.invalidate_unit_caches();
+        Ok(())
+    }
+
+    /// Reloads the user manager, which needs no privileges, and drops the
+    /// cached unit file sets
+    async fn reload_user_manager(&self) -> Result<()> {
+        self.invalidate_unit_caches();
+        self.run_systemctl_command(true, &["daemon-reload"]).await
     }
 
+    /// Writes a unit file to the system unit directory and reloads systemd
+    /// so that it picks the unit up. The system manager is reloaded in the
+    /// same privileged step as the write, so it takes a single authentication.
+    ///
+    /// Nothing in the UI creates service files yet, so this, and with it the
+    /// persistent root shell, is not reachable from the app today.
     pub async fn create_service_file(&self, service_name: &str, content: &str) -> Result<()> {
         let service_path = format!("/etc/systemd/system/{}.service", service_name);
+        let script = format!(
+            "{} && systemctl daemon-reload",
+            atomic_write_script(&service_path, content)
+        );
+
+        match self.run_privileged(&script).await {
+            Ok((0, _)) => {}
+            Ok((status, stderr)) => {
+                return Err(anyhow!(
+                    "Failed to create service file: {}",
+                    failure_detail(status, &stderr)
+                ))
+            }
+            Err(e) if e.is::<AuthorizationRefused>() => return Err(e),
+            Err(e) => {
+                warn!("Privileged shell unavailable, using pkexec directly: {}", e);
+                self.install_service_file(&service_path, content).await?;
+            }
+        }
+
+        self.reload_user_manager().await
+    }
+
+    /// Runs `script` as root in the shared privileged shell, starting it on
+    /// first use, and returns its exit status and stderr. Fails with
+    /// `AuthorizationRefused` if the user declined to authenticate; any other
+    /// error means the shell was lost, so callers can fall back to a one-off
+    /// pkexec.
+    async fn run_privileged(&self, script: &str) -> Result<(i32, String)> {
+        let mut shell = self.privileged_shell.lock().await;
 
-        // Write service file (requires sudo)
-        let mut cmd = TokioCommand::new("sudo");
-        cmd.args(&["tee", &service_path])
+        if shell.is_none() {
+            *shell = Some(PrivilegedShell::spawn(PRIVILEGED_SHELL)?);
+        }
+
+        let result = shell.as_mut().unwrap().run(script).await;
+        if result.is_err() {
+            *shell = None;
+        }
+        result
+    }
+
+    async fn install_service_file(&self, service_path: &str, content: &str) -> Result<()> {
+        // Stream the content into install(1) so the file is written with its
+        // final mode, and reload the system manager, in one privileged step
+        let mut cmd = host_command("pkexec");
+        cmd.args(&["sh", "-c", INSTALL_UNIT_SCRIPT, "sh", service_path])
             .stdin(Stdio::piped())
-            .stdout(Stdio::piped())
+            .stdout(Stdio::null())
             .stderr(Stdio::piped());
 
         let mut child = cmd.spawn()?;
 
-        if let Some(stdin) = child.stdin.as_mut() {
-            use tokio::io::AsyncWriteExt;
+        if let Some(mut stdin) = child.stdin.take() {
             stdin.write_all(content.as_bytes()).await?;
         }
 
@@ -170,16 +607,20 @@ impl ServiceManager {
             return Err(anyhow!("Failed to create service file: {}", stderr));
         }
 
-        // Reload systemd after creating new service
-        self.daemon_reload().await?;
-
         Ok(())
     }
 
-    async fn run_systemctl_command(&self, args: &[&str]) -> Result<()> {
-        let cmd = TokioCommand::new("systemctl")
+    /// Runs a systemctl command against the user manager if `user` is set,
+    /// or against the system manager otherwise
+    async fn run_systemctl_command(&self, user: bool, args: &[&str]) -> Result<()> {
+        let mut cmd = host_command("systemctl");
+        if user {
+            cmd.arg("--user");
+        }
+
+        let cmd = cmd
             .args(args)
-            .stdout(Stdio::piped())
+            .stdout(Stdio::null())
             .stderr(Stdio::piped())
             .output()
             .await?;
@@ -192,91 +633,30 @@ impl ServiceManager {
         Ok(())
     }
 
-    fn parse_service_list(&self, output: &str) -> Result<Vec<ServiceInfo>> {
-        let mut services = Vec::new();
-        let lines: Vec<&str> = output.lines().collect();
-
-        // Skip header lines and find the start of service listings
-        let mut start_idx = 0;
-        for (i, line) in lines.iter().enumerate() {
-            if line.starts_with("UNIT") {
-                start_idx = i + 1;
-                break;
-            }
-        }
-
-        for line in lines.iter().skip(start_idx) {
-            if line.trim().is_empty() || line.starts_with("LOAD") {
-                break;
-            }
-
-            if let Some(service) = self.parse_service_line(line) {
-                services.push(service);
-            }
-        }
-
-        Ok(services)
+    fn parse_unit_file_names(&self, output: &str) -> HashSet<String> {
+        output
+            .lines()
+            .filter_map(|line| line.split_whitespace().next())
+            .map(|unit| unit.strip_suffix(".service").unwrap_or(unit).to_string())
+            .collect()
     }
 
-    fn parse_service_line(&self, line: &str) -> Option<ServiceInfo> {
-        let parts: Vec<&str> = line.split_whitespace().collect();
-        if parts.len() < 4 {
-            return None;
-        }
-
-        let name = parts[0].trim_end_matches(".service").to_string();
-        let load_state = parts[1].to_string();
-        let active_state = parts[2].to_string();
-        let sub_state = parts[3].to_string();
-
-        let description = if parts.len() > 4 {
-            Some(parts[4..].join(" "))
-        } else {
-            None
-        };
-
-        let status = ServiceStatus::from(active_state.as_str());
-        let active = active_state == "active";
-
-        Some(ServiceInfo {
-            name,
-            status,
-            description,
-            enabled: false, // This would need a separate query
-            active,
-            load_state,
-            sub_state,
-        })
+    /// Parses the blank-line separated records printed by `systemctl show`
+    /// for several units
+    fn parse_service_records(&self, output: &str) -> Vec<ServiceInfo> {
+        output
+            .split("\n\n")
+            .filter_map(|record| {
+                let properties = parse_properties(record);
+                let name = properties.id?.trim_end_matches(".service");
+                Some(service_from_properties(name, &properties))
+            })
+            .collect()
     }
 
     fn parse_service_status(&self, service_name: &str, output: &str) -> Result<ServiceInfo> {
-        let mut properties = HashMap::new();
-
-        for line in output.lines() {
-            if let Some((key, value)) = line.split_once('=') {
-                properties.insert(key.trim(), value.trim());
-            }
-        }
-
-        let active_state = properties.get("ActiveState").unwrap_or(&"unknown");
-        let sub_state = properties.get("SubState").unwrap_or(&"unknown");
-        let load_state = properties.get("LoadState").unwrap_or(&"unknown");
-        let unit_file_state = properties.get("UnitFileState").unwrap_or(&"unknown");
-        let description = properties.get("Description").map(|s| s.to_string());
-
-        let status = ServiceStatus::from(*active_state);
-        let active = *active_state == "active";
-        let enabled = *unit_file_state == "enabled";
-
-        Ok(ServiceInfo {
-            name: service_name.to_string(),
-            status,
-            description,
-            enabled,
-            active,
-            load_state: load_state.to_string(),
-            sub_state: sub_state.to_string(),
-        })
+        let properties = parse_properties(output);
+        Ok(service_from_properties(service_name, &properties))
     }
 }
 
@@ -359,90 +739,121 @@ impl RemoteServiceManager {
     }
 
     fn parse_service_list(&self, output: &str) -> Result<Vec<ServiceInfo>> {
-        // Same parsing logic as local service manager
-        let mut services = Vec::new();
-        let lines: Vec<&str> = output.lines().collect();
-
-        let mut start_idx = 0;
-        for (i, line) in lines.iter().enumerate() {
-            if line.starts_with("UNIT") {
-                start_idx = i + 1;
-                break;
-            }
-        }
-
-        for line in lines.iter().skip(start_idx) {
-            if line.trim().is_empty() || line.starts_with("LOAD") {
-                break;
-            }
-
-            if let Some(service) = self.parse_service_line(line) {
-                services.push(service);
-            }
-        }
+        Ok(parse_unit_list(output))
+    }
 
-        Ok(services)
+    fn parse_service_status(&self, service_name: &str, output: &str) -> Result<ServiceInfo> {
+        let properties = parse_properties(output);
+        Ok(service_from_properties(service_name, &properties))
     }
+}
+
+/// Parses the table printed by `systemctl list-units`
+fn parse_unit_list(output: &str) -> Vec<ServiceInfo> {
+    // Skip the column header if there is one. It is indented to leave room
+    // for the failed-unit marker.
+    let body = output
+        .lines()
+        .position(|line| line.trim_start().starts_with("UNIT"))
+        .map_or(0, |header| header + 1);
+
+    output
+        .lines()
+        .skip(body)
+        .take_while(|line| !line.trim().is_empty() && !line.starts_with("LOAD"))
+        .filter_map(parse_unit_line)
+        .collect()
+}
 
-    fn parse_service_line(&self, line: &str) -> Option<ServiceInfo> {
-        let parts: Vec<&str> = line.split_whitespace().collect();
-        if parts.len() < 4 {
+/// Parses one `list-units` row. The four state columns are sliced out of the
+/// line and the rest is taken as the description, without collecting the
+/// words into a vector and joining them again.
+fn parse_unit_line(line: &str) -> Option<ServiceInfo> {
+    // Failed units are marked with a bullet in front of the unit name
+    let mut rest = line.trim_start_matches(|c: char| c == '●' || c == '*' || c.is_whitespace());
+    let mut fields = [""; 4];
+
+    for field in &mut fields {
+        let end = rest.find(char::is_whitespace).unwrap_or(rest.len());
+        if end == 0 {
             return None;
         }
+        *field = &rest[..end];
+        rest = rest[end..].trim_start();
+    }
 
-        let name = parts[0].trim_end_matches(".service").to_string();
-        let load_state = parts[1].to_string();
-        let active_state = parts[2].to_string();
-        let sub_state = parts[3].to_string();
+    let [unit, load_state, active_state, sub_state] = fields;
+    let description = rest.trim_end();
+
+    Some(ServiceInfo {
+        name: unit.trim_end_matches(".service").to_string(),
+        status: ServiceStatus::from(active_state),
+        description: (!description.is_empty()).then(|| description.to_string()),
+        enabled: false, // list-units has no enablement column
+        active: active_state == "active",
+        load_state: load_state.to_string(),
+        sub_state: sub_state.to_string(),
+        state_mask: state_mask(active_state, sub_state),
+    })
+}
 
-        let description = if parts.len() > 4 {
-            Some(parts[4..].join(" "))
-        } else {
-            None
-        };
+/// The `systemctl show` properties a ServiceInfo is built from
+#[derive(Default)]
+struct ShowRecord<'a> {
+    id: Option<&'a str>,
+    description: Option<&'a str>,
+    load_state: Option<&'a str>,
+    active_state: Option<&'a str>,
+    sub_state: Option<&'a str>,
+    unit_file_state: Option<&'a str>,
+}
 
-        let status = ServiceStatus::from(active_state.as_str());
-        let active = active_state == "active";
-
-        Some(ServiceInfo {
-            name,
-            status,
-            description,
-            enabled: false,
-            active,
-            load_state,
-            sub_state,
-        })
-    }
+/// Picks the properties we use out of `systemctl show` output. Other keys
+/// are skipped rather than stored, so no map is built per record.
+fn parse_properties(output: &str) -> ShowRecord<'_> {
+    let mut record = ShowRecord::default();
 
-    fn parse_service_status(&self, service_name: &str, output: &str) -> Result<ServiceInfo> {
-        let mut properties = HashMap::new();
+    for line in output.lines() {
+        let Some((key, value)) = line.split_once('=') else {
+            continue;
+        };
 
-        for line in output.lines() {
-            if let Some((key, value)) = line.split_once('=') {
-                properties.insert(key.trim(), value.trim());
-            }
+        let value = Some(value.trim());
+        match key.trim() {
+            "Id" => record.id = value,
+            "Description" => record.description = value,
+            "LoadState" => record.load_state = value,
+            "ActiveState" => record.active_state = value,
+            "SubState" => record.sub_state = value,
+            "UnitFileState" => record.unit_file_state = value,
+            _ => {}
         }
+    }
 
-        let active_state = properties.get("ActiveState").unwrap_or(&"unknown");
-        let sub_state = properties.get("SubState").unwrap_or(&"unknown");
-        let load_state = properties.get("LoadState").unwrap_or(&"unknown");
-        let unit_file_state = properties.get("UnitFileState").unwrap_or(&"unknown");
-        let description = properties.get("Description").map(|s| s.to_string());
-
-        let status = ServiceStatus::from(*active_state);
-        let active = *active_state == "active";
-        let enabled = *unit_file_state == "enabled";
-
-        Ok(ServiceInfo {
-            name: service_name.to_string(),
-            status,
-            description,
-            enabled,
-            active,
-            load_state: load_state.to_string(),
-            sub_state: sub_state.to_string(),
-        })
+    record
+}
+
+fn service_from_properties(service_name: &str, properties: &ShowRecord) -> ServiceInfo {
+    let active_state = properties.active_state.unwrap_or("unknown");
+    let sub_state = properties.sub_state.unwrap_or("unknown");
+    let load_state = properties.load_state.unwrap_or("unknown");
+    let unit_file_state = properties.unit_file_state.unwrap_or("unknown");
+    let description = properties.description.map(|s| s.to_string());
+
+    let status = ServiceStatus::from(active_state);
+    let active = active_state == "active";
+    let enabled = unit_file_state == "enabled";
+    let state_mask = state_mask(active_state, sub_state);
+
+    ServiceInfo {
+        name: service_name.to_string(),
+        status,
+        description,
+        enabled,
+        active,
+        load_state: load_state.to_string(),
+        sub_state: sub_state.to_string(),
+        state_mask,
     }
 }
 
@@ -465,4 +876,174 @@ mod tests {
         assert_eq!(format!("{}", ServiceStatus::Failed), "Failed");
         assert_eq!(format!("{}", ServiceStatus::Unknown), "Unknown");
     }
+
+    #[test]
+    fn test_state_mask() {
+        assert_eq!(
+            state_mask("active", "running"),
+            STATE_ACTIVE | STATE_RUNNING
+        );
+        assert_eq!(state_mask("inactive", "dead"), STATE_INACTIVE | STATE_DEAD);
+        assert_eq!(state_mask("failed", "failed"), STATE_FAILED);
+        assert_eq!(state_mask("reloading", "foo"), STATE_RELOADING);
+        assert_eq!(state_mask("maintenance", "foo"), STATE_UNKNOWN);
+    }
+
+    #[test]
+    fn test_matches_state() {
+        let service =
+            parse_unit_line("ssh.service loaded active running OpenBSD Secure Shell server")
+                .unwrap();
+
+        assert!(service.matches_state(STATE_ACTIVE));
+        assert!(service.matches_state(STATE_RUNNING | STATE_FAILED));
+        assert!(!service.matches_state(STATE_INACTIVE | STATE_FAILED));
+        assert!(service.matches_state(STATE_ALL));
+        assert!(service.matches_state(STATE_LISTED));
+        assert!(!ServiceInfo {
+            state_mask: state_mask("inactive", "dead"),
+            ..service
+        }
+        .matches_state(STATE_LISTED));
+    }
+
+    #[test]
+    fn test_parse_unit_list() {
+        let output = "  UNIT            LOAD   ACTIVE SUB     DESCRIPTION\n\
+                      cron.service      loaded active running Regular  background jobs\n\
+                      ● foo.service     loaded failed failed  Foo\n\
+                      bar.service       loaded active exited\n\
+                      \n\
+                      LOAD   = Reflects whether the unit definition was properly loaded.\n";
+        let services = parse_unit_list(output);
+
+        assert_eq!(services.len(), 3);
+        assert_eq!(services[0].name, "cron");
+        assert_eq!(
+            services[0].description.as_deref(),
+            Some("Regular  background jobs")
+        );
+        assert_eq!(services[1].name, "foo");
+        assert_eq!(services[1].status, ServiceStatus::Failed);
+        assert_eq!(services[2].sub_state, "exited");
+        assert_eq!(services[2].description, None);
+    }
+
+    #[test]
+    fn test_parse_service_records() {
+        let manager = ServiceManager::new(Arc::new(Runtime::new().unwrap()));
+        let services = manager.parse_service_records(
+            "Id=ssh.service\nDescription=OpenBSD Secure Shell server\nLoadState=loaded\n\
+             ActiveState=active\nSubState=running\nUnitFileState=enabled\n\n\
+             Id=cups.service\nDescription=CUPS Scheduler\nLoadState=loaded\n\
+             ActiveState=inactive\nSubState=dead\nUnitFileState=disabled\n",
+        );
+
+        assert_eq!(services.len(), 2);
+        assert_eq!(services[0].name, "ssh");
+        assert_eq!(services[0].status, ServiceStatus::Active);
+        assert!(services[0].enabled);
+        assert_eq!(services[1].name, "cups");
+        assert_eq!(services[1].status, ServiceStatus::Inactive);
+        assert!(!services[1].enabled);
+        assert_eq!(services[1].description.as_deref(), Some("CUPS Scheduler"));
+    }
+
+    #[test]
+    fn test_journal_commands() {
+        let follow_user = JOURNAL_COMMANDS[true as usize][true as usize];
+        assert_eq!(follow_user, &["journalctl", "--user", "-f", "-u"]);
+        assert!(!JOURNAL_COMMANDS[false as usize][false as usize].contains(&"-f"));
+        assert!(!JOURNAL_COMMANDS[true as usize][false as usize].contains(&"--user"));
+    }
+
+    #[test]
+    fn test_shell_quote() {
+        assert_eq!(shell_quote("plain"), "'plain'");
+        assert_eq!(shell_quote("it's"), "'it'\\''s'");
+    }
+
+    #[test]
+    fn test_privileged_shell_protocol() {
+        let runtime = Runtime::new().unwrap();
+        runtime.block_on(async {
+            let mut shell = PrivilegedShell::spawn(&["sh"]).unwrap();
+            assert_eq!(shell.run("true").await.unwrap(), (0, String::new()));
+            assert_eq!(
+                shell
+                    .run("echo noise; echo oops >&2; exit_code() { return 3; }; exit_code")
+                    .await
+                    .unwrap(),
+                (3, "oops\n".to_string())
+            );
+            // stderr without a trailing newline must not hide the marker
+            assert_eq!(
+                shell.run("printf oops >&2; false").await.unwrap(),
+                (1, "oops".to_string())
+            );
+            assert_eq!(
+                shell
+                    .run(&format!("test {} = \"it's\"", shell_quote("it's")))
+                    .await
+                    .unwrap()
+                    .0,
+                0
+            );
+            assert!(shell.authenticated);
+
+            // pkexec's exit status when authentication is dismissed
+            let mut refused = PrivilegedShell::spawn(&["sh", "-c", "exit 126"]).unwrap();
+            let error = refused.run("true").await.unwrap_err();
+            assert!(error.is::<AuthorizationRefused>());
+        });
+    }
+
+    #[test]
+    fn test_failure_detail() {
+        assert_eq!(failure_detail(1, "mv: cannot move\n"), "mv: cannot move");
+        assert_eq!(failure_detail(2, " \n"), "exit status 2");
+    }
+
+    #[test]
+    fn test_atomic_write_script() {
+        use std::os::unix::fs::PermissionsExt;
+
+        let dir = std::env::temp_dir().join(format!("systemd-pilot-write-{}", std::process::id()));
+        std::fs::create_dir_all(&dir).unwrap();
+        let path = dir.join("demo.service");
+        let path_str = path.to_str().unwrap();
+        std::fs::write(&path, "old").unwrap();
+
+        let runtime = Runtime::new().unwrap();
+        runtime.block_on(async {
+            let mut shell = PrivilegedShell::spawn(&["sh"]).unwrap();
+            let content = "[Unit]\nDescription=it's 100% new\n";
+            let script = atomic_write_script(path_str, content);
+            assert_eq!(shell.run(&script).await.unwrap(), (0, String::new()));
+            assert_eq!(std::fs::read_to_string(&path).unwrap(), content);
+            let mode = std::fs::metadata(&path).unwrap().permissions().mode();
+            assert_eq!(mode & 0o777, 0o644);
+            assert!(!dir.join("demo.service.tmp").exists());
+
+            let missing = dir.join("missing").join("demo.service");
+            let script = atomic_write_script(missing.to_str().unwrap(), content);
+            assert_ne!(shell.run(&script).await.unwrap().0, 0);
+            assert_eq!(shell.run("true").await.unwrap().0, 0);
+        });
+
+        std::fs::remove_dir_all(&dir).unwrap();
+    }
+
+    #[test]
+    fn test_parse_unit_file_names() {
+        let manager = ServiceManager::new(Arc::new(Runtime::new().unwrap()));
+        let units = manager.parse_unit_file_names(
+            "syncthing.service enabled enabled\npipewire.service disabled enabled\n\n",
+        );
+
+        assert_eq!(units.len(), 2);
+        assert!(units.contains("syncthing"));
+        assert!(units.contains("pipewire"));
+        assert!(!units.contains("ssh"));
+    }
 }
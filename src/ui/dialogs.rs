@@ -404,6 +404,10 @@ pub fn show_service_logs_dialog(
     let text_buffer = text_view.buffer();
     text_buffer.set_text(logs);
 
+    // Journal output is oldest first, so start at the newest entries
+    let end_mark = text_buffer.create_mark(None, &text_buffer.end_iter(), false);
+    text_view.scroll_to_mark(&end_mark, 0.0, false, 0.0, 0.0);
+
     scrolled.set_child(Some(&text_view));
 
     let content_box = gtk4::Box::new(gtk4::Orientation::Vertical, 0);
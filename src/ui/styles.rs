@@ -482,12 +482,19 @@ const COMPONENT_STYLES: &str = r#"
 
 /// Applies additional component-specific styles to a widget
 pub fn apply_component_styles(widget: &impl IsA<Widget>) -> Result<(), Box<dyn std::error::Error>> {
-    let css_provider = CssProvider::new();
-
-    css_provider.load_from_data(COMPONENT_STYLES);
+    thread_local! {
+        // The stylesheet never changes, so it is parsed once and shared
+        static COMPONENT_PROVIDER: CssProvider = {
+            let css_provider = CssProvider::new();
+            css_provider.load_from_data(COMPONENT_STYLES);
+            css_provider
+        };
+    }
 
     let style_context = widget.style_context();
-    style_context.add_provider(&css_provider, STYLE_PROVIDER_PRIORITY_APPLICATION);
+    COMPONENT_PROVIDER.with(|css_provider| {
+        style_context.add_provider(css_provider, STYLE_PROVIDER_PRIORITY_APPLICATION)
+    });
 
     debug!("Applied component-specific styles");
     Ok(())
@@ -0,0 +1,60 @@
+use std::path::Path;
+use std::sync::OnceLock;
+use tokio::process::Command;
+
+/// Arguments that run a command on the host from inside the Flatpak sandbox
+const FLATPAK_HOST_PREFIX: &[&str] = &["flatpak-spawn", "--host"];
+
+static HOST_PREFIX: OnceLock<&'static [&'static str]> = OnceLock::new();
+
+/// Returns whether the app is running inside a Flatpak sandbox. The answer
+/// can't change while the app is running, so the file is only checked once.
+pub fn is_running_in_flatpak() -> bool {
+    !host_prefix().is_empty()
+}
+
+/// Arguments to put in front of a command so that it runs on the host:
+/// empty outside Flatpak, `flatpak-spawn --host` inside it
+pub fn host_prefix() -> &'static [&'static str] {
+    HOST_PREFIX.get_or_init(|| {
+        if Path::new("/.flatpak-info").exists() {
+            FLATPAK_HOST_PREFIX
+        } else {
+            &[]
+        }
+    })
+}
+
+/// Creates a command that runs `program` on the host
+pub fn host_command(program: &str) -> Command {
+    match host_prefix().split_first() {
+        Some((first, rest)) => {
+            let mut cmd = Command::new(first);
+            cmd.args(rest).arg(program);
+            cmd
+        }
+        None => Command::new(program),
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_host_command() {
+        let cmd = host_command("systemctl");
+        let std_cmd = cmd.as_std();
+        let argv: Vec<_> = std::iter::once(std_cmd.get_program())
+            .chain(std_cmd.get_args())
+            .collect();
+
+        let expected: Vec<_> = host_prefix()
+            .iter()
+            .copied()
+            .chain(["systemctl"])
+            .map(std::ffi::OsStr::new)
+            .collect();
+        assert_eq!(argv, expected);
+    }
+}
@@ -1,3 +1,7 @@
+pub mod host;
+pub mod terminal;
 pub mod theme;
 
+pub use host::*;
+pub use terminal::*;
 pub use theme::*;
@@ -0,0 +1,305 @@
+use anyhow::{anyhow, Result};
+use gio::prelude::*;
+use log::{debug, error};
+use std::borrow::Cow;
+use std::ffi::OsStr;
+use std::os::unix::fs::PermissionsExt;
+use std::path::{Path, PathBuf};
+use std::process::Stdio;
+use std::sync::Mutex;
+use std::time::{Duration, Instant};
+use tokio::runtime::Handle;
+
+use super::host::{host_prefix, is_running_in_flatpak};
+
+/// A terminal emulator and the arguments that precede the command to run
+#[derive(Debug, Clone)]
+pub struct Terminal {
+    pub binary: Cow<'static, str>,
+    pub exec_args: &'static [&'static str],
+}
+
+impl Terminal {
+    /// Describes a user-chosen terminal, reusing the exec arguments of a
+    /// known emulator with the same name and the xterm convention otherwise
+    fn from_binary(binary: String) -> Self {
+        let name = Path::new(&binary)
+            .file_name()
+            .and_then(OsStr::to_str)
+            .unwrap_or_default();
+        let exec_args = TERMINALS
+            .iter()
+            .find(|terminal| terminal.binary == name)
+            .map_or(&["-e"][..], |terminal| terminal.exec_args);
+
+        Self {
+            binary: Cow::Owned(binary),
+            exec_args,
+        }
+    }
+}
+
+/// Supported terminal emulators, in order of preference
+pub const TERMINALS: &[Terminal] = &[
+    Terminal {
+        binary: Cow::Borrowed("gnome-terminal"),
+        exec_args: &["--"],
+    },
+    Terminal {
+        binary: Cow::Borrowed("xfce4-terminal"),
+        exec_args: &["-x"],
+    },
+    Terminal {
+        binary: Cow::Borrowed("konsole"),
+        exec_args: &["-e"],
+    },
+    Terminal {
+        binary: Cow::Borrowed("x-terminal-emulator"),
+        exec_args: &["-e"],
+    },
+];
+
+/// Exit status of the host probe for the first terminal in `TERMINALS`. It
+/// is kept clear of the low statuses flatpak-spawn and the shell use for
+/// their own failures.
+const HOST_PROBE_BASE: i32 = 100;
+
+/// How soon after a spawn a failing exit means the terminal couldn't start
+const EARLY_EXIT_WINDOW: Duration = Duration::from_secs(2);
+
+static TERMINAL: Mutex<Option<Option<Terminal>>> = Mutex::new(None);
+
+/// Returns the user's terminal emulator, or the first supported one that is
+/// installed. The lookup runs once and is reused until the cache is
+/// invalidated.
+pub fn terminal_command() -> Option<Terminal> {
+    TERMINAL
+        .lock()
+        .unwrap()
+        .get_or_insert_with(probe_terminal)
+        .clone()
+}
+
+/// Forgets the cached terminal so the next use looks it up again
+pub fn invalidate_terminal_cache() {
+    *TERMINAL.lock().unwrap() = None;
+}
+
+/// Runs `command` in a new terminal window. If the cached terminal can't be
+/// started, e.g. because it was uninstalled, it is looked up once more. The
+/// lookups run on `runtime`, as probing the host may block.
+pub async fn spawn_in_terminal(runtime: &Handle, command: &[&str]) -> Result<()> {
+    let terminal = lookup_terminal(runtime, false).await?;
+
+    if let Err(e) = spawn_terminal(&terminal, command, Some(runtime)) {
+        debug!("Retrying with a fresh terminal lookup: {}", e);
+        let terminal = lookup_terminal(runtime, true).await?;
+        spawn_terminal(&terminal, command, None)?;
+    }
+
+    Ok(())
+}
+
+/// Returns the cached terminal, or probes for it again first if `fresh` is
+/// set, on a blocking thread of `runtime`
+async fn lookup_terminal(runtime: &Handle, fresh: bool) -> Result<Terminal> {
+    runtime
+        .spawn_blocking(move || {
+            if fresh {
+                invalidate_terminal_cache();
+            }
+            terminal_command()
+        })
+        .await?
+        .ok_or_else(|| anyhow!("No supported terminal emulator found"))
+}
+
+/// Starts `terminal` running `command`. With `retry` set, an early failure
+/// of a terminal started through flatpak-spawn triggers a fresh lookup on
+/// that runtime and a second attempt.
+fn spawn_terminal(terminal: &Terminal, command: &[&str], retry: Option<&Handle>) -> Result<()> {
+    let argv: Vec<&OsStr> = host_prefix()
+        .iter()
+        .copied()
+        .chain(std::iter::once(terminal.binary.as_ref()))
+        .chain(terminal.exec_args.iter().copied())
+        .chain(command.iter().copied())
+        .map(OsStr::new)
+        .collect();
+
+    let child = gio::Subprocess::newv(&argv, gio::SubprocessFlags::NONE)?;
+
+    // Inside Flatpak the process started here is flatpak-spawn, which starts
+    // fine even if the host terminal is gone and then exits with an error.
+    // Only a failure right after the spawn counts: a terminal closed later
+    // may exit with any status.
+    if let Some(runtime) = retry.filter(|_| is_running_in_flatpak()) {
+        let runtime = runtime.clone();
+        let command: Vec<String> = command.iter().map(|arg| arg.to_string()).collect();
+        let started = Instant::now();
+
+        child.wait_check_async(None::<&gio::Cancellable>, move |result| {
+            let Err(e) = result else {
+                return;
+            };
+            if started.elapsed() > EARLY_EXIT_WINDOW {
+                return;
+            }
+
+            debug!("Retrying with a fresh terminal lookup: {}", e);
+            glib::spawn_future_local(async move {
+                let command: Vec<&str> = command.iter().map(String::as_str).collect();
+                let respawn = async {
+                    let terminal = lookup_terminal(&runtime, true).await?;
+                    spawn_terminal(&terminal, &command, None)
+                };
+
+                if let Err(e) = respawn.await {
+                    error!("Failed to start a terminal: {}", e);
+                }
+            });
+        });
+    }
+
+    Ok(())
+}
+
+fn probe_terminal() -> Option<Terminal> {
+    // The sandbox's environment and app registry say nothing about the host
+    let terminal = if is_running_in_flatpak() {
+        probe_host_terminal().cloned()
+    } else {
+        preferred_terminal().or_else(|| probe_local_terminal().cloned())
+    };
+    debug!("Using terminal emulator: {:?}", terminal);
+    terminal
+}
+
+/// Looks up the terminal the user asked for through `$TERMINAL` or the
+/// desktop's default terminal application, without spawning anything
+fn preferred_terminal() -> Option<Terminal> {
+    let from_env = std::env::var("TERMINAL")
+        .ok()
+        .filter(|binary| find_executable(binary).is_some());
+
+    let binary = from_env.or_else(|| {
+        gio::AppInfo::default_for_type("application/x-terminal-emulator", false)
+            .and_then(|app| app.executable().to_str().map(String::from))
+            .filter(|binary| find_executable(binary).is_some())
+    })?;
+
+    Some(Terminal::from_binary(binary))
+}
+
+fn probe_local_terminal() -> Option<&'static Terminal> {
+    // Scan PATH in-process rather than forking `which` for every candidate
+    TERMINALS
+        .iter()
+        .find(|terminal| find_executable(&terminal.binary).is_some())
+}
+
+/// Resolves `binary` like the shell would: as a path if it contains a
+/// slash, otherwise by searching PATH
+fn find_executable(binary: &str) -> Option<PathBuf> {
+    if binary.is_empty() {
+        return None;
+    }
+
+    if binary.contains('/') {
+        let path = PathBuf::from(binary);
+        return is_executable(&path).then_some(path);
+    }
+
+    let path = std::env::var_os("PATH")?;
+    std::env::split_paths(&path)
+        .map(|dir| dir.join(binary))
+        .find(|candidate| is_executable(candidate))
+}
+
+fn probe_host_terminal() -> Option<&'static Terminal> {
+    // The sandbox can't see the host's PATH, so ask the host shell for the
+    // first installed candidate in a single call. It answers through its exit
+    // status, so no output is piped back.
+    let candidates = TERMINALS
+        .iter()
+        .map(|terminal| terminal.binary.as_ref())
+        .collect::<Vec<_>>()
+        .join(" ");
+    let script = format!(
+        "i={}; for b in {}; do command -v \"$b\" >/dev/null && exit $i; i=$((i + 1)); done; exit 0",
+        HOST_PROBE_BASE, candidates
+    );
+
+    let mut argv: Vec<&OsStr> = host_prefix().iter().copied().map(OsStr::new).collect();
+    argv.extend([OsStr::new("sh"), OsStr::new("-c"), OsStr::new(&script)]);
+
+    let status = std::process::Command::new(argv[0])
+        .args(&argv[1..])
+        .stdin(Stdio::null())
+        .stdout(Stdio::null())
+        .stderr(Stdio::null())
+        .status()
+        .ok()?;
+
+    terminal_at(status.code()?)
+}
+
+/// Maps the host probe's exit status back to a terminal
+fn terminal_at(code: i32) -> Option<&'static Terminal> {
+    let index = usize::try_from(code.checked_sub(HOST_PROBE_BASE)?).ok()?;
+    TERMINALS.get(index)
+}
+
+fn is_executable(path: &Path) -> bool {
+    path.metadata()
+        .map(|metadata| metadata.is_file() && metadata.permissions().mode() & 0o111 != 0)
+        .unwrap_or(false)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_is_executable() {
+        let dir = std::env::temp_dir().join(format!("systemd-pilot-test-{}", std::process::id()));
+        std::fs::create_dir_all(&dir).unwrap();
+
+        let script = dir.join("terminal");
+        let data = dir.join("data");
+        std::fs::write(&script, "#!/bin/sh\n").unwrap();
+        std::fs::write(&data, "").unwrap();
+        std::fs::set_permissions(&script, std::fs::Permissions::from_mode(0o755)).unwrap();
+        std::fs::set_permissions(&data, std::fs::Permissions::from_mode(0o644)).unwrap();
+
+        assert!(is_executable(&script));
+        assert!(!is_executable(&data));
+        assert!(!is_executable(&dir));
+        assert!(!is_executable(&dir.join("missing")));
+
+        std::fs::remove_dir_all(&dir).unwrap();
+    }
+
+    #[test]
+    fn test_terminal_from_binary() {
+        let known = Terminal::from_binary("/usr/bin/gnome-terminal".to_string());
+        assert_eq!(known.binary, "/usr/bin/gnome-terminal");
+        assert_eq!(known.exec_args, &["--"]);
+
+        let other = Terminal::from_binary("kitty".to_string());
+        assert_eq!(other.exec_args, &["-e"]);
+    }
+
+    #[test]
+    fn test_terminal_at() {
+        let last = HOST_PROBE_BASE + TERMINALS.len() as i32 - 1;
+        assert_eq!(
+            terminal_at(HOST_PROBE_BASE).unwrap().binary,
+            "gnome-terminal"
+        );
+        assert_eq!(terminal_at(last).unwrap().binary, "x-terminal-emulator");
+        assert!(terminal_at(0).is_none());
+        assert!(terminal_at(1).is_none());
+        assert!(terminal_at(last + 1).is_none());
+    }
+}
@@ -3,22 +3,27 @@ use gio::Settings;
 use gtk4::prelude::*;
 use gtk4::{CssProvider, StyleContext, Widget, STYLE_PROVIDER_PRIORITY_APPLICATION};
 use log::{debug, error, info, warn};
-use std::cell::RefCell;
+use std::cell::{OnceCell, RefCell};
 use std::rc::Rc;
 
 pub struct ThemeManager {
     is_dark_mode: RefCell<bool>,
-    css_provider: CssProvider,
+    // One provider per theme, each parsed the first time it is applied
+    light_provider: OnceCell<CssProvider>,
+    dark_provider: OnceCell<CssProvider>,
+    // Theme whose provider is currently registered on the display
+    applied_theme: RefCell<Option<bool>>,
 }
 
 impl ThemeManager {
     pub fn new() -> Self {
-        let css_provider = CssProvider::new();
         let is_dark_mode = RefCell::new(Self::detect_system_theme());
 
         Self {
             is_dark_mode,
-            css_provider,
+            light_provider: OnceCell::new(),
+            dark_provider: OnceCell::new(),
+            applied_theme: RefCell::new(None),
         }
     }
 
@@ -64,23 +69,47 @@ impl ThemeManager {
             settings.set_property("gtk-application-prefer-dark-theme", is_dark);
         }
 
-        // Load custom CSS
-        let css = self.get_custom_css(is_dark);
+        let previous = *self.applied_theme.borrow();
+        if previous == Some(is_dark) {
+            return;
+        }
 
-        self.css_provider.load_from_data(&css);
+        let Some(display) = Display::default() else {
+            warn!("No display to apply the theme to");
+            return;
+        };
 
-        // Apply CSS to the display
-        if let Some(display) = Display::default() {
-            StyleContext::add_provider_for_display(
-                &display,
-                &self.css_provider,
-                STYLE_PROVIDER_PRIORITY_APPLICATION,
-            );
+        // Swap the registered provider instead of re-parsing the stylesheet
+        // and stacking another provider on the display
+        if let Some(previous) = previous {
+            StyleContext::remove_provider_for_display(&display, self.css_provider(previous));
         }
+        StyleContext::add_provider_for_display(
+            &display,
+            self.css_provider(is_dark),
+            STYLE_PROVIDER_PRIORITY_APPLICATION,
+        );
 
+        // Only recorded once the provider is on the display, so a call made
+        // before there is one still applies the theme later
+        self.applied_theme.replace(Some(is_dark));
         debug!("Applied {} theme", if is_dark { "dark" } else { "light" });
     }
 
+    fn css_provider(&self, is_dark: bool) -> &CssProvider {
+        let cell = if is_dark {
+            &self.dark_provider
+        } else {
+            &self.light_provider
+        };
+
+        cell.get_or_init(|| {
+            let provider = CssProvider::new();
+            provider.load_from_data(&self.get_custom_css(is_dark));
+            provider
+        })
+    }
+
     fn get_custom_css(&self, is_dark: bool) -> String {
         let base_css = r#"
             /* Base styling for systemd Pilot */